@@ -1,10 +1,57 @@
 """
 Data loading and preprocessing module for timetable CSP
 """
+import os
 import pandas as pd
 import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Set, Tuple, Any
 
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+def read_csv_fast(filepath: str) -> pd.DataFrame:
+    """Read a CSV with the fastest available parser (polars > pyarrow > pandas)"""
+    if pl is not None:
+        return pl.read_csv(filepath).to_pandas()
+    try:
+        return pd.read_csv(filepath, engine='pyarrow')
+    except (ImportError, ValueError):
+        return pd.read_csv(filepath)
+
+@lru_cache(maxsize=4096)
+def parse_course_set(s: str) -> frozenset:
+    """Parse a comma-separated course list; cached since strings repeat"""
+    return frozenset(c.strip() for c in s.split(',') if c.strip())
+
+@lru_cache(maxsize=4096)
+def parse_course_tuple(s: str) -> tuple:
+    """Order-preserving variant of parse_course_set"""
+    return tuple(c.strip() for c in s.split(',') if c.strip())
+
+@lru_cache(maxsize=16)
+def _read_csv_cached(filepath: str, mtime: float) -> pd.DataFrame:
+    """Cache parsed CSVs keyed by path and modification time"""
+    return read_csv_fast(filepath)
+
+def read_csv(filepath: str) -> pd.DataFrame:
+    """Read a CSV, reusing the cached parse while the file is unchanged"""
+    return _read_csv_cached(filepath, os.path.getmtime(filepath))
+
+DAY_NUMS = {
+    'Sunday': 0, 'Monday': 1, 'Tuesday': 2, 'Wednesday': 3,
+    'Thursday': 4, 'Friday': 5, 'Saturday': 6
+}
+# One DFA pass over the preferred-slots string instead of seven substring scans
+DAY_RE = re.compile('|'.join(DAY_NUMS))
+# Each day owns 4 consecutive timeslots; DAY_MASK[day] covers all of them
+# as bits in a 20-bit mask (5 working days x 4 slots).
+DAY_MASK = {day: 0xF << (num * 4) for day, num in DAY_NUMS.items()}
+ALL_SLOTS_MASK = 0xFFFFF
+
 class DataLoader:
     def __init__(self):
         self.courses = {}
@@ -15,115 +62,122 @@ class DataLoader:
         
     def load_courses(self, filepath: str) -> Dict[str, Dict]:
         """Load courses from CSV file"""
-        df = pd.read_csv(filepath)
-        courses = {}
-        
-        for _, row in df.iterrows():
-            course_id = row['CourseID']
-            course_type = 'lab' if 'Lab' in row['Type'] else 'lec'
-            courses[course_id] = {
-                'name': row['CourseName'],
-                'credits': row['Credits'],
-                'type': course_type
+        df = read_csv(filepath)
+
+        # Pull raw columns once instead of materializing a Series per row
+        ids = df['CourseID'].to_numpy()
+        names = df['CourseName'].to_numpy()
+        credits = df['Credits'].to_numpy()
+        # Classify all course types in one pass through pandas' C kernel
+        is_lab = df['Type'].str.contains('Lab', regex=False, na=False).to_numpy()
+
+        courses = {
+            ids[i]: {
+                'name': names[i],
+                'credits': credits[i],
+                'type': 'lab' if is_lab[i] else 'lec'
             }
+            for i in range(len(df))
+        }
         self.courses = courses
         return courses
     
     def load_instructors(self, filepath: str) -> Dict[str, Dict]:
         """Load instructors from CSV file"""
-        df = pd.read_csv(filepath)
+        df = read_csv(filepath)
         instructors = {}
-        
-        for _, row in df.iterrows():
-            instructor_id = row['InstructorID']
-            qualified_courses = set()
-            
-            # Parse qualified courses
-            if pd.notna(row['QualifiedCourses']):
-                courses_str = str(row['QualifiedCourses'])
-                qualified_courses = set(courses_str.split(','))
-                qualified_courses = {c.strip() for c in qualified_courses if c.strip()}
-            
-            # Parse preferred slots
-            preferred_slots = set()
-            if pd.notna(row['PreferredSlots']):
-                pref_str = str(row['PreferredSlots'])
+
+        # Pull raw columns once instead of materializing a Series per row
+        ids = df['InstructorID'].to_numpy()
+        names = df['Name'].to_numpy()
+        roles = df['Role'].to_numpy()
+        qc = df['QualifiedCourses'].to_numpy()
+        ps = df['PreferredSlots'].to_numpy()
+
+        for i in range(len(df)):
+            # Parse qualified courses (cached per distinct string)
+            qualified_courses = parse_course_set(qc[i]) if isinstance(qc[i], str) else frozenset()
+
+            # Parse preferred slots into a 20-bit mask (bit = slot to avoid)
+            preferred_mask = 0
+            if isinstance(ps[i], str):
+                pref_str = ps[i]
                 if pref_str != 'Any time':
-                    # Extract day restrictions
-                    day_mapping = {
-                        'Sunday': 0, 'Monday': 1, 'Tuesday': 2, 'Wednesday': 3, 
-                        'Thursday': 4, 'Friday': 5, 'Saturday': 6
-                    }
-                    for day, day_num in day_mapping.items():
-                        if day in pref_str:
-                            # Add all timeslots for this day as restricted
-                            for ts_id in range(day_num * 4, (day_num + 1) * 4):
-                                preferred_slots.add(ts_id)
-            
-            instructors[instructor_id] = {
-                'name': row['Name'],
-                'role': row['Role'],
+                    # Extract day restrictions in one regex pass
+                    for day in DAY_RE.findall(pref_str):
+                        preferred_mask |= DAY_MASK[day]
+
+            instructors[ids[i]] = {
+                'name': names[i],
+                'role': roles[i],
                 'qualified_courses': qualified_courses,
-                'preferred_slots': preferred_slots,  # slots to avoid
-                'available_slots': set(range(20)) - preferred_slots  # available slots
+                'preferred_mask': preferred_mask,  # slots to avoid
+                # availability test: avail_mask >> slot & 1; AND-NOT rather
+                # than XOR so day bits past slot 19 (Fri/Sat) clear instead
+                # of leaking in as phantom available slots
+                'available_mask': ALL_SLOTS_MASK & ~preferred_mask
             }
         self.instructors = instructors
         return instructors
     
     def load_rooms(self, filepath: str) -> Dict[str, Dict]:
         """Load rooms from CSV file"""
-        df = pd.read_csv(filepath)
+        df = read_csv(filepath)
         rooms = {}
-        
-        for _, row in df.iterrows():
-            room_id = row['RoomID']
-            room_type = 'lab' if row['Type'] == 'Lab' else 'lec'
-            rooms[room_id] = {
+
+        # Pull raw columns once instead of materializing a Series per row
+        ids = df['RoomID'].to_numpy()
+        types = df['Type'].to_numpy()
+        caps = df['Capacity'].to_numpy()
+
+        for i in range(len(df)):
+            room_type = 'lab' if types[i] == 'Lab' else 'lec'
+            rooms[ids[i]] = {
                 'type': room_type,
-                'capacity': row['Capacity']
+                'capacity': caps[i]
             }
         self.rooms = rooms
         return rooms
     
     def load_timeslots(self, filepath: str) -> Dict[int, Dict]:
         """Load timeslots from CSV file"""
-        df = pd.read_csv(filepath)
+        df = read_csv(filepath)
         timeslots = {}
-        
-        day_mapping = {
-            'Sunday': 0, 'Monday': 1, 'Tuesday': 2, 'Wednesday': 3, 
-            'Thursday': 4, 'Friday': 5, 'Saturday': 6
-        }
-        
-        for idx, row in df.iterrows():
-            timeslot_id = idx
-            day_num = day_mapping[row['Day']]
-            timeslots[timeslot_id] = {
-                'day': row['Day'],
+
+
+        # Pull raw columns once instead of materializing a Series per row
+        days = df['Day'].to_numpy()
+        starts = df['StartTime'].to_numpy()
+        ends = df['EndTime'].to_numpy()
+        ts_ids = df['TimeSlotID'].to_numpy()
+
+        for i in range(len(df)):
+            day_num = DAY_NUMS[days[i]]
+            timeslots[i] = {
+                'day': days[i],
                 'day_num': day_num,
-                'start_time': row['StartTime'],
-                'end_time': row['EndTime'],
-                'timeslot_id': row['TimeSlotID']
+                'start_time': starts[i],
+                'end_time': ends[i],
+                'timeslot_id': ts_ids[i]
             }
         self.timeslots = timeslots
         return timeslots
     
     def load_sections(self, filepath: str) -> Dict[str, Dict]:
         """Load sections from CSV file"""
-        df = pd.read_csv(filepath)
+        df = read_csv(filepath)
         sections = {}
-        
-        for _, row in df.iterrows():
-            section_id = row['SectionID']
-            student_count = row['StudentCount']
-            
-            # Parse courses for this section
-            courses_str = str(row['Courses'])
-            course_list = [c.strip() for c in courses_str.split(',') if c.strip()]
-            
-            sections[section_id] = {
-                'student_count': student_count,
-                'courses': course_list
+
+        # Pull raw columns once instead of materializing a Series per row
+        ids = df['SectionID'].to_numpy()
+        counts = df['StudentCount'].to_numpy()
+        course_strs = df['Courses'].to_numpy()
+
+        for i in range(len(df)):
+            # Parse courses for this section (cached per distinct string)
+            sections[ids[i]] = {
+                'student_count': counts[i],
+                'courses': parse_course_tuple(str(course_strs[i]))
             }
         self.sections = sections
         return sections
@@ -131,12 +185,20 @@ class DataLoader:
     def load_all_data(self, base_path: str = ".") -> Dict[str, Any]:
         """Load all data files"""
         try:
-            courses = self.load_courses(f"{base_path}/Courses.csv")
-            instructors = self.load_instructors(f"{base_path}/Instructor.csv")
-            rooms = self.load_rooms(f"{base_path}/Rooms.csv")
-            timeslots = self.load_timeslots(f"{base_path}/TimeSlots.csv")
-            sections = self.load_sections(f"{base_path}/Sections.csv")
-            
+            # The five files are independent; overlap their parsing
+            with ThreadPoolExecutor(max_workers=5) as pool:
+                courses_f = pool.submit(self.load_courses, f"{base_path}/Courses.csv")
+                instructors_f = pool.submit(self.load_instructors, f"{base_path}/Instructor.csv")
+                rooms_f = pool.submit(self.load_rooms, f"{base_path}/Rooms.csv")
+                timeslots_f = pool.submit(self.load_timeslots, f"{base_path}/TimeSlots.csv")
+                sections_f = pool.submit(self.load_sections, f"{base_path}/Sections.csv")
+                courses = courses_f.result()
+                instructors = instructors_f.result()
+                rooms = rooms_f.result()
+                timeslots = timeslots_f.result()
+                sections = sections_f.result()
+
+
             return {
                 'courses': courses,
                 'instructors': instructors,
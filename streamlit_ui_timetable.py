@@ -1,9 +1,16 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import random
-from collections import defaultdict
-import io
-import base64
+from functools import lru_cache
+
+try:
+    from numba import njit
+except ImportError:  # numba not installed: run the kernels as plain Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda f: f
 
 # Streamlit interface setup
 st.set_page_config(page_title="University Timetable Generator", layout="wide")
@@ -121,24 +128,63 @@ st.markdown("Upload **Tables.xlsx** to automatically create your timetable. 📚
 uploaded_file = st.file_uploader("Choose Tables.xlsx", type=["xlsx"])
 
 # Utility functions
-def clean_str(x):
-    return "" if pd.isna(x) else str(x).strip()
-
-def to_int(x, default=0):
-    try:
-        return int(x)
-    except:
-        return default
-
-def match_room(ct, rt):
-    c, r = (ct or "").lower(), (rt or "").lower()
-    return c == r or ("lec" in c and "lec" in r) or ("lab" in c and "lab" in r) or ("project" in c and "project" in r) or "lec" in r
-
-# Load and process Excel
+@lru_cache(maxsize=4096)
+def parse_quals(s):
+    """Split a qualifications cell; cached since instructors share strings"""
+    return frozenset(s.replace(";", ",").split(","))
+
+def pick_col(df, *candidates):
+    """Resolve a column name case-insensitively, once per sheet."""
+    lower = {c.lower(): c for c in df.columns}
+    for cand in candidates:
+        if cand in lower:
+            return lower[cand]
+    return None
+
+def clean_col(df, col):
+    """Whole-column string cleanup: strip and blank out NaNs in one C pass."""
+    if not col:
+        return np.full(len(df), "", dtype=object)
+    return df[col].astype("string").str.strip().fillna("").to_numpy()
+
+def int_col(df, col, default=0):
+    """Whole-column int parse: coerce to numbers, defaulting NaNs and garbage."""
+    if not col:
+        return np.full(len(df), default, dtype=np.int64)
+    return pd.to_numeric(df[col], errors="coerce").fillna(default).astype(np.int64).to_numpy()
+
+# Room/course compatibility via precoded kind bitmasks instead of per-call
+# substring scans. Composite labels like "lecture,lab" set several bits; a
+# room matches when it shares a category with the course, is a lecture room
+# (the old "lec in r" catch-all), or carries the exact same label (the
+# old c == r rule for otherwise unknown types).
+KIND_LEC, KIND_LAB, KIND_PROJECT = 1, 2, 4
+
+def type_kind(t):
+    t = (t or "").lower()
+    kind = 0
+    if "lec" in t:
+        kind |= KIND_LEC
+    if "lab" in t:
+        kind |= KIND_LAB
+    if "project" in t:
+        kind |= KIND_PROJECT
+    return kind
+
+# Load and process Excel (cached: Streamlit reruns the whole script on every
+# widget interaction, so reparse only when the uploaded file changes)
+@st.cache_data(show_spinner=False)
 def load_and_process(file):
     try:
-        xls = pd.ExcelFile(file)
-        sheets = {n.lower(): n for n in xls.sheet_names}
+        # One pass over the workbook for all sheets; the Rust-backed calamine
+        # engine when installed, otherwise the default openpyxl parser
+        try:
+            all_sheets = pd.read_excel(file, sheet_name=None, engine="calamine")
+        except (ImportError, ValueError):
+            if hasattr(file, "seek"):
+                file.seek(0)
+            all_sheets = pd.read_excel(file, sheet_name=None, engine="openpyxl")
+        sheets = {n.lower(): n for n in all_sheets}
         req = {
             "crs": ["courses"],
             "inst": ["instructors", "instructor"],
@@ -151,58 +197,92 @@ def load_and_process(file):
         for k, v in req.items():
             for s in v:
                 if s in sheets:
-                    data[k] = pd.read_excel(xls, sheets[s])
+                    data[k] = all_sheets[sheets[s]]
                     break
             else:
                 raise RuntimeError(f"Missing sheet: {k}")
 
-        # Courses
-        crs = {clean_str(r.get("course_id", r.get("CourseID", r.iloc[0]))):
-               {"type": clean_str(r.get("type", r.get("Type", ""))).lower()}
-               for _, r in data["crs"].iterrows()}
+        # Courses (resolve columns once per sheet, then zip the cleaned arrays)
+        crs_df = data["crs"]
+        cid_col = pick_col(crs_df, "course_id", "courseid") or crs_df.columns[0]
+        crs = {c: {"type": t.lower()}
+               for c, t in zip(clean_col(crs_df, cid_col),
+                               clean_col(crs_df, pick_col(crs_df, "type")))}
 
         # Instructors
-        inst = {clean_str(r.get("instructor_id", r.get("instructors_id", r.get("InstructorID", r.iloc[0])))):
-                {"name": clean_str(r.get("name", r.get("Name", ""))),
-                 "quals": set(clean_str(r.get("qualifications", "")).replace(";", ",").split(","))}
-                for _, r in data["inst"].iterrows()}
+        inst_df = data["inst"]
+        iid_col = pick_col(inst_df, "instructor_id", "instructors_id", "instructorid") or inst_df.columns[0]
+        inst = {i: {"name": n,
+                    "quals": parse_quals(q)}
+                for i, n, q in zip(clean_col(inst_df, iid_col),
+                                   clean_col(inst_df, pick_col(inst_df, "name")),
+                                   clean_col(inst_df, pick_col(inst_df, "qualifications")))}
 
         # Rooms
-        rms = {clean_str(r.get("room_id", r.get("RoomID", r.iloc[0]))):
-               {"type": clean_str(r.get("type", r.get("Type", ""))).lower(),
-                "cap": to_int(r.get("capacity", 0))}
-               for _, r in data["rm"].iterrows()}
+        rm_df = data["rm"]
+        rid_col = pick_col(rm_df, "room_id", "roomid") or rm_df.columns[0]
+        rms = {r: {"type": t.lower(), "cap": int(c)}
+               for r, t, c in zip(clean_col(rm_df, rid_col),
+                                  clean_col(rm_df, pick_col(rm_df, "type")),
+                                  int_col(rm_df, pick_col(rm_df, "capacity")))}
 
         # Timeslots
+        ts_df = data["ts"]
+        tid_col = pick_col(ts_df, "time_slot_id", "timeslotid") or ts_df.columns[0]
         ts = []
         ts_info = {}
-        for _, r in data["ts"].iterrows():
-            tid = clean_str(r.get("time_slot_id", r.get("TimeSlotID", r.iloc[0])))
+        for tid, day, start, end in zip(clean_col(ts_df, tid_col),
+                                        clean_col(ts_df, pick_col(ts_df, "day")),
+                                        clean_col(ts_df, pick_col(ts_df, "start_time")),
+                                        clean_col(ts_df, pick_col(ts_df, "end_time"))):
             ts.append(tid)
-            ts_info[tid] = {
-                "day": clean_str(r.get("day", "")),
-                "start": clean_str(r.get("start_time", "")),
-                "end": clean_str(r.get("end_time", ""))
-            }
+            ts_info[tid] = {"day": day, "start": start, "end": end}
 
         # Sections
-        secs = [{"id": clean_str(r.get("section_id", r.iloc[0])),
-                 "year": to_int(r.get("year", 1)),
-                 "num": to_int(r.get("student", r.get("students", 0)))}
-                for _, r in data["sec"].iterrows()]
-
-        # Curriculum
-        cur = defaultdict(list)
-        for _, r in data["cur"].iterrows():
-            year = to_int(r.get("year", 1))
-            cid = clean_str(r.get("course_id", r.get("CourseID", "")))
-            if cid:
-                cur[year].append(cid)
+        sec_df = data["sec"]
+        sid_col = pick_col(sec_df, "section_id") or sec_df.columns[0]
+        secs = [{"id": s, "year": int(y), "num": int(n)}
+                for s, y, n in zip(clean_col(sec_df, sid_col),
+                                   int_col(sec_df, pick_col(sec_df, "year"), 1),
+                                   int_col(sec_df, pick_col(sec_df, "student", "students")))]
+
+        # Curriculum (one groupby pass instead of a per-row append loop)
+        cur_df = data["cur"]
+        years = int_col(cur_df, pick_col(cur_df, "year"), 1)
+        cids = clean_col(cur_df, pick_col(cur_df, "course_id", "courseid"))
+        keep = cids != ""
+        cur = pd.Series(cids[keep]).groupby(years[keep]).agg(list).to_dict()
 
         return crs, inst, rms, ts, ts_info, secs, cur
     except Exception as e:
         raise RuntimeError(f"Failed to process Excel file: {str(e)}")
 
+# Struct-of-arrays views over the rooms/instructors dicts: the solver
+# iterates integer indices over parallel arrays instead of dict lookups
+class RoomsTable:
+    def __init__(self, rms):
+        self.ids = list(rms.keys())
+        self.type = [rms[r]["type"] for r in self.ids]
+        self.kind = np.array([type_kind(t) for t in self.type], np.int8)
+        self.type_lower = np.array([(t or "").lower() for t in self.type], object)
+        self.cap = np.array([rms[r]["cap"] for r in self.ids], np.int32)
+
+class InstructorsTable:
+    def __init__(self, inst, course_bit):
+        self.ids = list(inst.keys())
+        self.names = [inst[i]["name"] for i in self.ids]
+        # Qualifications packed as one bit per known course; membership is
+        # (bits >> course_bit[cid]) & 1 instead of a set probe
+        self.course_bit = course_bit
+        self.quals_bits = []
+        for i in self.ids:
+            bits = 0
+            for c in inst[i]["quals"]:
+                b = course_bit.get(c)
+                if b is not None:
+                    bits |= 1 << b
+            self.quals_bits.append(bits)
+
 # Lecture class
 class Lec:
     def __init__(self, cid, sid, yr, idx, num):
@@ -213,62 +293,117 @@ class Lec:
         self.num = num
         self.name = f"{cid}_{sid}_L{idx}"
 
-# Build lectures and domains
-def build_lecs(crs, inst, rms, ts, secs, cur):
+# Build lectures; domains stay factored as (room_ok, qual_row) per lecture
+# instead of materializing the |ts| x |rooms| x |inst| product
+def build_lecs(crs, inst_tab, rooms_tab, ts, secs, cur):
     lecs = []
-    doms = {}
+    specs = {}
+    # Hoist the room-compat and qualification tests out of the product loop:
+    # both depend only on the course, not on the (timeslot, room, instructor) combo
+    room_ok_by_type = {}
+    qual_by_course = {}
     for s in secs:
         yr, num, sid = s["year"], s["num"], s["id"]
         for cid in cur.get(yr, []):
             ctype = crs.get(cid, {}).get("type", "")
+            if ctype not in room_ok_by_type:
+                # shared kind bits, the lec-room catch-all, or an exact
+                # label match, vectorized over the precoded room kinds
+                ck = type_kind(ctype)
+                room_ok_by_type[ctype] = (
+                    ((rooms_tab.kind & ck) != 0)
+                    | ((rooms_tab.kind & KIND_LEC) != 0)
+                    | (rooms_tab.type_lower == (ctype or "").lower())
+                ).astype(np.uint8)
+            if cid not in qual_by_course:
+                bit = inst_tab.course_bit.get(cid, -1)
+                qual_by_course[cid] = np.array(
+                    [(b >> bit) & 1 if bit >= 0 else 0 for b in inst_tab.quals_bits],
+                    np.uint8)
             sess = 2 if "lec" in ctype else 1
             for i in range(sess):
                 lec = Lec(cid, sid, yr, i, num)
                 lecs.append(lec)
-                dom = [(t, r, iid, cid in info["quals"])
-                       for t in ts
-                       for r, rinfo in rms.items()
-                       if match_room(ctype, rinfo["type"]) and rinfo["cap"] >= num
-                       for iid, info in inst.items()]
-                doms[lec] = dom
-    return lecs, doms
-
-# Assign lectures
-def assign_lecs(lecs, doms, inst, rms, ts):
+                specs[lec] = (room_ok_by_type[ctype], qual_by_course[cid])
+    return lecs, specs
+
+# Fused kernel: candidates are enumerated lazily, generator-style, in
+# qualified-then-unqualified order and never materialized as a list of
+# tuples; the first conflict-free combo short-circuits the search.
+# The explicit signature compiles at import time rather than on the first
+# Streamlit run, and cache=True persists the compiled code across restarts.
+@njit('UniTuple(int64, 4)(uint8[:], int32[:], int64, uint8[:], uint8[:,:], uint8[:,:], int64)',
+      cache=True)
+def _assign_kernel(room_ok, room_cap, num, qual_row, room_busy, inst_busy, n_ts):
+    n_rooms = room_ok.shape[0]
+    n_inst = qual_row.shape[0]
+    for want_qual in range(1, -1, -1):
+        for t in range(n_ts):
+            for r in range(n_rooms):
+                if room_ok[r] == 0 or room_cap[r] < num:
+                    continue
+                if room_busy[r, t] == 1:
+                    continue
+                for i in range(n_inst):
+                    if qual_row[i] != want_qual:
+                        continue
+                    if inst_busy[i, t] == 1:
+                        continue
+                    return t, r, i, want_qual
+    return -1, -1, -1, 0
+
+# Assign lectures (candidates are generated inside the kernel; decode ids
+# only for the final pick)
+def assign_lecs(lecs, specs, inst_tab, rooms_tab, ts):
     assigns = {}
-    used_rt = set()
-    used_it = set()
+    n_ts = len(ts)
+    n_rooms = len(rooms_tab.ids)
+    n_inst = len(inst_tab.ids)
+    # Conflict bitmaps: busy[resource, slot] replaces the tuple sets
+    room_busy = np.zeros((n_rooms, n_ts), np.uint8)
+    inst_busy = np.zeros((n_inst, n_ts), np.uint8)
+    rng = random.Random(42)  # one seeded generator: reproducible fallbacks
     for lec in sorted(lecs, key=lambda x: -x.num):
-        dom = doms.get(lec, [])
-        opts = [d for d in dom if d[3]] + [d for d in dom if not d[3]]
-        pick = next((d for d in opts if (d[0], d[1]) not in used_rt and (d[0], d[2]) not in used_it), None)
-        if not pick:
-            pick = random.choice(dom) if dom else (random.choice(ts), random.choice(list(rms.keys())), random.choice(list(inst.keys())), False)
-        assigns[lec] = pick
-        used_rt.add((pick[0], pick[1]))
-        used_it.add((pick[0], pick[2]))
+        room_ok, qual_row = specs[lec]
+        t, r, i, q = _assign_kernel(room_ok, rooms_tab.cap, lec.num, qual_row,
+                                    room_busy, inst_busy, n_ts)
+        if t < 0:
+            # every candidate conflicts: fall back to a random one, matching
+            # the old random.choice over the (possibly empty) domain
+            fit = np.flatnonzero((room_ok == 1) & (rooms_tab.cap >= lec.num))
+            t = rng.randrange(n_ts)
+            i = rng.randrange(n_inst)
+            if len(fit):
+                r = int(fit[rng.randrange(len(fit))])
+                q = int(qual_row[i])
+            else:
+                r = rng.randrange(n_rooms)
+                q = 0
+        room_busy[r, t] = 1
+        inst_busy[i, t] = 1
+        assigns[lec] = (ts[t], rooms_tab.ids[r], inst_tab.ids[i], bool(q))
     return assigns
 
-# Generate CSV
+# Generate CSV (assemble columns: pandas ingests columns far faster than
+# a list of per-row dicts, and each ts_info lookup happens once per row)
 def save_csv(assigns, ts_info, inst):
-    rows = [
-        {
-            "Lec": lec.name,
-            "Year": lec.yr,
-            "Course": lec.cid,
-            "Section": lec.sid,
-            "Time": a[0],
-            "Day": ts_info.get(a[0], {}).get("day", ""),
-            "Start": ts_info.get(a[0], {}).get("start", ""),
-            "End": ts_info.get(a[0], {}).get("end", ""),
-            "Room": a[1],
-            "InstID": a[2],
-            "InstName": inst.get(a[2], {}).get("name", a[2]),
-            "Qualified": bool(a[3])
-        }
-        for lec, a in assigns.items() if a
-    ]
-    return pd.DataFrame(rows)
+    items = [(lec, a) for lec, a in assigns.items() if a]
+    times = [a[0] for _, a in items]
+    infos = [ts_info.get(t, {}) for t in times]
+    return pd.DataFrame({
+        "Lec": [lec.name for lec, _ in items],
+        "Year": [lec.yr for lec, _ in items],
+        "Course": [lec.cid for lec, _ in items],
+        "Section": [lec.sid for lec, _ in items],
+        "Time": times,
+        "Day": [i.get("day", "") for i in infos],
+        "Start": [i.get("start", "") for i in infos],
+        "End": [i.get("end", "") for i in infos],
+        "Room": [a[1] for _, a in items],
+        "InstID": [a[2] for _, a in items],
+        "InstName": [inst.get(a[2], {}).get("name", a[2]) for _, a in items],
+        "Qualified": [bool(a[3]) for _, a in items]
+    })
 
 # Process file and show results
 if uploaded_file is not None:
@@ -278,21 +413,29 @@ if uploaded_file is not None:
         crs, inst, rms, ts, ts_info, secs, cur = data
         st.success(f"Loaded: {len(crs)} courses, {len(inst)} instructors, {len(rms)} rooms, {len(ts)} timeslots, {len(secs)} sections")
 
-        lecs, doms = build_lecs(crs, inst, rms, ts, secs, cur)
+        rooms_tab = RoomsTable(rms)
+        # bit per course id seen anywhere: Courses sheet plus qualification
+        # tokens, so instructors stay flagged for courses missing from the
+        # sheet (the old set probe did not care where the id came from)
+        course_bit = {cid: k for k, cid in enumerate(crs)}
+        for info in inst.values():
+            for c in info["quals"]:
+                if c not in course_bit:
+                    course_bit[c] = len(course_bit)
+        inst_tab = InstructorsTable(inst, course_bit)
+        lecs, specs = build_lecs(crs, inst_tab, rooms_tab, ts, secs, cur)
         st.write(f"Created {len(lecs)} lectures")
 
-        assigns = assign_lecs(lecs, doms, inst, rms, ts)
+        assigns = assign_lecs(lecs, specs, inst_tab, rooms_tab, ts)
         timetable_df = save_csv(assigns, ts_info, inst)
 
         st.write("### 📅 Generated Timetable:")
         st.dataframe(timetable_df, use_container_width=True)
 
-        csv_buffer = io.StringIO()
-        timetable_df.to_csv(csv_buffer, index=False)
-        csv_data = csv_buffer.getvalue()
-        b64 = base64.b64encode(csv_data.encode()).decode()
-        href = f'<a href="data:file/csv;base64,{b64}" download="timetable_solution.csv">⬇️ Download Timetable CSV</a>'
-        st.markdown(href, unsafe_allow_html=True)
+        st.download_button("⬇️ Download Timetable CSV",
+                           data=timetable_df.to_csv(index=False).encode(),
+                           file_name="timetable_solution.csv",
+                           mime="text/csv")
 
     except Exception as e:
         st.error(f"Error: {str(e)}")
@@ -1,386 +1,581 @@
-import pandas as pd
-import random
-import time
-from collections import defaultdict
-import tkinter as tk
-from tkinter import filedialog, messagebox
-
-
-# Utilities: flexible column lookup
-
-def find_column(df, candidates):
-    """Return the first candidate name that exists in df.columns, else None."""
-    for c in candidates:
-        for col in df.columns:
-            if col.strip().lower() == c.strip().lower():
-                return col
-    return None
-
-def safe_str(x):
-    return "" if pd.isna(x) else str(x).strip()
-
-def int_safe(x, default=0):
-    try:
-        return int(x)
-    except:
-        return default
-
-def compatible_room(course_type, room_type):
-    c, r = (course_type or "").lower(), (room_type or "").lower()
-    if not c:
-        return True
-    if c == r:
-        return True
-    if "lec" in c and "lec" in r:
-        return True
-    if "lab" in c and "lab" in r:
-        return True
-    if "project" in c and "project" in r:
-        return True
-    if "lec" in r:
-        return True
-    return False
-
-# Load Excel (detect sheets)
-
-def load_tables_xlsx(path):
-    xls = pd.ExcelFile(path)
-    names = xls.sheet_names
-    expected = {
-        "courses": ["courses"],
-        "instructors": ["instructors","instructor"],
-        "rooms": ["rooms","room"],
-        "timeslots": ["timeslots","time slots","time_slots","timeslot"],
-        "sections": ["sections","section"],
-        "curriculum": ["curriculum"]
-    }
-    data = {}
-    missing = []
-    lowered = {n.lower(): n for n in names}
-    for key, variants in expected.items():
-        found_sheet = None
-        for v in variants:
-            if v in lowered:
-                found_sheet = lowered[v]
-                break
-        if not found_sheet:
-            missing.append(key)
-        else:
-            data[key] = pd.read_excel(xls, found_sheet)
-    if missing:
-        raise RuntimeError(f"Missing sheets in {path}: {missing}. Present sheets: {names}")
-    return data["courses"], data["instructors"], data["rooms"], data["timeslots"], data["sections"], data["curriculum"]
-
-# Preprocess (robust col names)
-
-def preprocess(courses_df, instructors_df, rooms_df, timeslots_df, sections_df, curriculum_df):
-    # Courses: find columns
-    course_id_col = find_column(courses_df, ["course_id","courseid","course code","code","id"])
-    course_name_col = find_column(courses_df, ["course_name","coursename","name","title"])
-    course_type_col = find_column(courses_df, ["type","course_type","kind"])
-
-    courses = {}
-    for _, r in courses_df.iterrows():
-        cid = safe_str(r.get(course_id_col, r.iloc[0] if len(r)>0 else ""))
-        if not cid:
-            continue
-        cname = safe_str(r.get(course_name_col, ""))
-        ctype = safe_str(r.get(course_type_col, "")).lower()
-        courses[cid] = {"name": cname, "type": ctype}
-
-    # Instructors: flexible columns (fix for instructor_id error)
-    instr_id_col = find_column(instructors_df, ["instructor_id","instructors_id","id","instructorid","instr_id"])
-    instr_name_col = find_column(instructors_df, ["name","full_name","instructor_name"])
-    instr_quals_col = find_column(instructors_df, ["qualifications","qualification","qualified_courses","quals"])
-
-    if instr_id_col is None:
-        raise RuntimeError("Could not find instructor ID column in Instructors sheet. Columns found: " + ", ".join(instructors_df.columns))
-
-    instructors = {}
-    for _, r in instructors_df.iterrows():
-        iid = safe_str(r.get(instr_id_col, ""))
-        if not iid:
-            # skip blank id rows
-            continue
-        iname = safe_str(r.get(instr_name_col, ""))
-        raw_q = safe_str(r.get(instr_quals_col, ""))
-        # normalize separators ; or /
-        raw_q = raw_q.replace(";",",").replace("/",",")
-        quals = [q.strip() for q in raw_q.split(",") if q.strip()]
-        instructors[iid] = {"name": iname or iid, "quals": set(quals)}
-
-    # Rooms
-    room_id_col = find_column(rooms_df, ["room_id","roomid","room","id"])
-    room_type_col = find_column(rooms_df, ["type","room_type","roomtype"])
-    room_cap_col = find_column(rooms_df, ["capacity","cap","room_capacity"])
-    rooms = {}
-    for _, r in rooms_df.iterrows():
-        rid = safe_str(r.get(room_id_col, r.iloc[0] if len(r)>0 else ""))
-        if not rid:
-            continue
-        rtype = safe_str(r.get(room_type_col, "")).lower()
-        cap = int_safe(r.get(room_cap_col, 0))
-        rooms[rid] = {"type": rtype, "capacity": cap}
-
-    # TimeSlots
-    ts_id_col = find_column(timeslots_df, ["time_slot_id","timeslotid","timeslot","id"])
-    ts_day_col = find_column(timeslots_df, ["day","weekday"])
-    ts_start_col = find_column(timeslots_df, ["start_time","start","begin"])
-    ts_end_col = find_column(timeslots_df, ["end_time","end","finish"])
-    timeslots = []
-    timeslot_info = {}
-    for _, r in timeslots_df.iterrows():
-        tid = safe_str(r.get(ts_id_col, r.iloc[0] if len(r)>0 else ""))
-        if not tid:
-            continue
-        day = safe_str(r.get(ts_day_col, ""))
-        start = safe_str(r.get(ts_start_col, ""))
-        end = safe_str(r.get(ts_end_col, ""))
-        timeslots.append(tid)
-        timeslot_info[tid] = {"day": day, "start": start, "end": end}
-
-    # Sections
-    sec_id_col = find_column(sections_df, ["section_id","sectionid","section","id"])
-    sec_group_col = find_column(sections_df, ["group_number","group","groupno"])
-    sec_year_col = find_column(sections_df, ["year"])
-    sec_student_col = find_column(sections_df, ["student","students","student_count","studentcount","students_count"])
-    sections=[]
-    for _, r in sections_df.iterrows():
-        sid = safe_str(r.get(sec_id_col, r.iloc[0] if len(r)>0 else ""))
-        if not sid:
-            continue
-        group = safe_str(r.get(sec_group_col, ""))
-        year = int_safe(r.get(sec_year_col, 1))
-        students = int_safe(r.get(sec_student_col, 0))
-        sections.append({"section_id": sid, "group": group, "year": year, "students": students})
-
-    # Curriculum
-    cur_year_col = find_column(curriculum_df, ["year"])
-    cur_course_col = find_column(curriculum_df, ["course_id","courseid","course","id"])
-    curriculum = defaultdict(list)
-    for _, r in curriculum_df.iterrows():
-        year = int_safe(r.get(cur_year_col, 1))
-        cid = safe_str(r.get(cur_course_col, ""))
-        if cid:
-            curriculum[year].append(cid)
-
-    # Basic sanity check messages
-    msgs = []
-    if not courses:
-        msgs.append("Warning: no courses found (Courses sheet may be empty or columns different).")
-    if not instructors:
-        msgs.append("Warning: no instructors found.")
-    if not rooms:
-        msgs.append("Warning: no rooms found.")
-    if not timeslots:
-        msgs.append("Warning: no timeslots found.")
-    if not sections:
-        msgs.append("Warning: no sections found.")
-    if not curriculum:
-        msgs.append("Warning: no curriculum mapping found.")
-
-    return courses, instructors, rooms, timeslots, timeslot_info, sections, curriculum, msgs
-
-# Build variables & domains
-
-class LectureVar:
-    def __init__(self, course, section, year, idx, students):
-        self.course = course
-        self.section = section
-        self.year = year
-        self.idx = idx
-        self.students = students
-        self.name = f"{course}_{section}_L{idx}"
-    def __repr__(self):
-        return self.name
-    def __hash__(self):
-        return hash(self.name)
-    def __eq__(self, other):
-        return isinstance(other, LectureVar) and self.name==other.name
-
-def build_vars_domains(courses, instructors, rooms, timeslots, sections, curriculum):
-    variables = []
-    domains = {}
-    instr_list = list(instructors.keys()) if instructors else []
-    for sec in sections:
-        year = sec["year"]
-        students = sec["students"]
-        s_id = sec["section_id"]
-        clist = curriculum.get(year, [])
-        for cid in clist:
-            ctype = courses.get(cid, {}).get("type","")
-            sessions = 2 if "lec" in ctype else 1
-            for i in range(sessions):
-                v = LectureVar(cid, s_id, year, i, students)
-                variables.append(v)
-                dom = []
-                for t in timeslots:
-                    for r, rinfo in rooms.items():
-                        if not compatible_room(ctype, rinfo.get("type","")):
-                            continue
-                        if rinfo.get("capacity",0) < students:
-                            continue
-                        # any instructor allowed (qualification flagged)
-                        for instr in instr_list:
-                            qual = cid in instructors[instr]["quals"]
-                            dom.append((t, r, instr, qual))
-                domains[v] = dom
-    return variables, domains
-
-
-# Greedy solver (hard constraints enforced)
-def greedy_assign(variables, domains):
-    assigned = {}
-    used_room_ts = set()
-    used_instr_ts = set()
-    violations = 0
-    for v in sorted(variables, key=lambda x: -x.students):
-        dom = domains.get(v, [])
-        # prefer qualified
-        qualified = [d for d in dom if d[3]]
-        other = [d for d in dom if not d[3]]
-        chosen = None
-        for option in (qualified + other):
-            t,r,instr,qual = option
-            if (t,r) in used_room_ts or (t,instr) in used_instr_ts:
-                continue
-            chosen = option
-            break
-        if not chosen:
-            # fallback: pick option minimizing conflicts
-            best = None
-            best_conf = 1e9
-            for option in dom:
-                t,r,instr,qual = option
-                conf = 0
-                if (t,r) in used_room_ts: conf += 1
-                if (t,instr) in used_instr_ts: conf += 1
-                if conf < best_conf:
-                    best_conf = conf
-                    best = option
-            if best:
-                chosen = best
-                violations += 1
-        if not chosen:
-            # ultimate synthetic fallback 
-            t = domains and next(iter(dom))[0] if dom else "ts0"
-            r = domains and next(iter(dom))[1] if dom else "room0"
-            instr = domains and next(iter(dom))[2] if dom else "instr0"
-            chosen = (t,r,instr, False)
-            violations += 1
-        assigned[v] = chosen
-        t,r,instr,_ = chosen
-        used_room_ts.add((t,r))
-        used_instr_ts.add((t,instr))
-    return assigned, violations
-
-
-# Local improvement to increase qualified assignments (no hard-constraint breaks)
-def improve_assignments(assigned, domains, instructors, max_iters=5000):
-    room_ts = set((t,r) for v,(t,r,i,q) in assigned.items())
-    instr_ts = set((t,i) for v,(t,r,i,q) in assigned.items())
-    unqualified = [v for v,val in assigned.items() if not val[3]]
-    random.shuffle(unqualified)
-    improved = 0
-    it = 0
-    while unqualified and it < max_iters:
-        v = unqualified.pop()
-        it += 1
-        dom = domains.get(v, [])
-        found = None
-        for opt in dom:
-            t,r,i,q = opt
-            if not q: continue
-            # check conflicts ignoring current v's current spot
-            cur = assigned[v]
-            ct,cr,ci,cq = cur
-            conflict = False
-            # room conflict
-            if (t,r) in room_ts and not (t==ct and r==cr):
-                conflict = True
-            if (t,i) in instr_ts and not (t==ct and i==ci):
-                conflict = True
-            if not conflict:
-                found = opt
-                break
-        if found:
-            # free old
-            ct,cr,ci,cq = assigned[v]
-            room_ts.discard((ct,cr)); instr_ts.discard((ct,ci))
-            assigned[v] = found
-            nt,nr,ni,nq = found
-            room_ts.add((nt,nr)); instr_ts.add((nt,ni))
-            improved += 1
-    return assigned, improved
-
-# Export CSV and report
-def export_results(assigned, timeslot_info, instructors, out_csv="timetable_solution.csv", report_file="report.txt", runtime=0, violations=0, improved=0):
-    rows=[]
-    for v,val in assigned.items():
-        t,r,iid,qual = val
-        info = timeslot_info.get(t, {"day":"", "start":"", "end":""})
-        instr_name = instructors.get(iid, {}).get("name", iid)
-        rows.append({
-            "Variable": v.name,
-            "Year": v.year,
-            "Course": v.course,
-            "Section": v.section,
-            "TimeslotID": t,
-            "Day": info.get("day",""),
-            "Start": info.get("start",""),
-            "End": info.get("end",""),
-            "Room": r,
-            "InstructorID": iid,
-            "InstructorName": instr_name,
-            "InstructorQualified": bool(qual)
-        })
-    df = pd.DataFrame(rows)
-    df.to_csv(out_csv, index=False)
-    # report
-    total = len(rows)
-    qualified = sum(1 for r in rows if r["InstructorQualified"])
-    with open(report_file, "w", encoding="utf-8") as f:
-        f.write(f"Timetable generation report\n")
-        f.write(f"Rows (assigned lectures): {total}\n")
-        f.write(f"Qualified assignments: {qualified}\n")
-        f.write(f"Unqualified assignments: {total-qualified}\n")
-        f.write(f"Violations during greedy (fallbacks): {violations}\n")
-        f.write(f"Local improvements applied: {improved}\n")
-        f.write(f"Generation time (s): {runtime:.4f}\n")
-    return out_csv, report_file
-
-# GUI & orchestration
-def run_gui():
-    root = tk.Tk()
-    root.title("Timetable CSP Generator (v3)")
-
-    def choose_and_run():
-        path = filedialog.askopenfilename(filetypes=[("Excel files","*.xlsx;*.xls")])
-        if not path:
-            return
-        try:
-            t0 = time.time()
-            courses_df, instructors_df, rooms_df, timeslots_df, sections_df, curriculum_df = load_tables_xlsx(path)
-            courses, instructors, rooms, timeslots, timeslot_info, sections, curriculum, msgs = preprocess(
-                courses_df, instructors_df, rooms_df, timeslots_df, sections_df, curriculum_df
-            )
-            log_msgs = "\n".join(msgs)
-            variables, domains = build_vars_domains(courses, instructors, rooms, timeslots, sections, curriculum)
-            assigned, violations = greedy_assign(variables, domains)
-            assigned, improved = improve_assignments(assigned, domains, instructors)
-            runtime = time.time() - t0
-            out_csv, report_file = export_results(assigned, timeslot_info, instructors, runtime=runtime, violations=violations, improved=improved)
-            messagebox.showinfo("Done", f"Generated {out_csv}\nReport: {report_file}\nTime: {runtime:.2f}s\n{log_msgs}")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
-
-    tk.Label(root, text="Select Tables.xlsx and generate timetable").pack(padx=12, pady=8)
-    tk.Button(root, text="Choose Tables.xlsx", command=choose_and_run, width=30, bg="#2b7", fg="black").pack(pady=8)
-    tk.Button(root, text="Quit", command=root.quit, width=10, bg="#f55").pack(pady=6)
-    root.mainloop()
-
-if __name__ == "__main__":
-    run_gui()
-
-    #streamlet
-
+import csv
+import os
+import pandas as pd
+import numpy as np
+import random
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+
+# Utilities: flexible column lookup
+
+def find_column(df, candidates):
+    """Return the first candidate name that exists in df.columns, else None."""
+    # lowercase the columns once and probe the dict per candidate
+    cols_lower = {col.strip().lower(): col for col in df.columns}
+    for c in candidates:
+        col = cols_lower.get(c.strip().lower())
+        if col is not None:
+            return col
+    return None
+
+def str_col(df, col):
+    """Whole-column string cleanup: strip and blank out NaNs in one pass."""
+    if col is None:
+        return np.full(len(df), "", dtype=object)
+    return df[col].astype("string").str.strip().fillna("").to_numpy()
+
+def int_col(df, col, default=0):
+    """Whole-column int parse: coerce to int32 with a default for bad cells."""
+    if col is None:
+        return np.full(len(df), default, dtype=np.int32)
+    return pd.to_numeric(df[col], errors='coerce').fillna(default).astype(np.int32).to_numpy()
+
+# Kind bitmasks classify the free-form type labels once at load time.
+# Composite labels like "lecture,lab" set several bits, so a single code
+# cannot stand in for them; compatibility is a shared bit, the lec-room
+# catch-all, or compatible_room's empty/exact-label residue.
+KIND_LEC, KIND_LAB, KIND_PROJECT = 1, 2, 4
+
+@lru_cache(maxsize=128)
+def classify_kind(type_str):
+    s = (type_str or "").lower()
+    kind = 0
+    if "lec" in s:
+        kind |= KIND_LEC
+    if "lab" in s:
+        kind |= KIND_LAB
+    if "project" in s:
+        kind |= KIND_PROJECT
+    return kind
+
+@lru_cache(maxsize=128)
+def compatible_room(course_type, room_type):
+    # only a handful of (course_type, room_type) pairs exist, so the
+    # substring tests run once per pair and hit the cache afterwards
+    c, r = (course_type or "").lower(), (room_type or "").lower()
+    if not c:
+        return True
+    if c == r:
+        return True
+    if "lec" in c and "lec" in r:
+        return True
+    if "lab" in c and "lab" in r:
+        return True
+    if "project" in c and "project" in r:
+        return True
+    if "lec" in r:
+        return True
+    return False
+
+# Load Excel (detect sheets)
+
+def load_tables_xlsx(path):
+    # Rust-backed calamine engine when installed, else default openpyxl
+    try:
+        xls = pd.ExcelFile(path, engine="calamine")
+    except (ImportError, ValueError):
+        xls = pd.ExcelFile(path, engine="openpyxl")
+    names = xls.sheet_names
+    expected = {
+        "courses": ["courses"],
+        "instructors": ["instructors","instructor"],
+        "rooms": ["rooms","room"],
+        "timeslots": ["timeslots","time slots","time_slots","timeslot"],
+        "sections": ["sections","section"],
+        "curriculum": ["curriculum"]
+    }
+    found_sheets = {}
+    missing = []
+    lowered = {n.lower(): n for n in names}
+    for key, variants in expected.items():
+        found_sheet = None
+        for v in variants:
+            if v in lowered:
+                found_sheet = lowered[v]
+                break
+        if not found_sheet:
+            missing.append(key)
+        else:
+            found_sheets[key] = found_sheet
+    if missing:
+        raise RuntimeError(f"Missing sheets in {path}: {missing}. Present sheets: {names}")
+    # one workbook parse for all six sheets instead of one per call
+    frames = pd.read_excel(xls, sheet_name=list(found_sheets.values()))
+    data = {key: frames[name] for key, name in found_sheets.items()}
+    return data["courses"], data["instructors"], data["rooms"], data["timeslots"], data["sections"], data["curriculum"]
+
+# Preprocess (robust col names)
+
+def preprocess(courses_df, instructors_df, rooms_df, timeslots_df, sections_df, curriculum_df):
+    # Courses: find columns
+    course_id_col = find_column(courses_df, ["course_id","courseid","course code","code","id"])
+    course_name_col = find_column(courses_df, ["course_name","coursename","name","title"])
+    course_type_col = find_column(courses_df, ["type","course_type","kind"])
+
+    courses = {}
+    for cid, cname, ctype in zip(str_col(courses_df, course_id_col or courses_df.columns[0]),
+                                 str_col(courses_df, course_name_col),
+                                 str_col(courses_df, course_type_col)):
+        if not cid:
+            continue
+        courses[cid] = {"name": cname, "type": ctype.lower(), "kind": classify_kind(ctype)}
+
+    # Instructors: flexible columns (fix for instructor_id error)
+    instr_id_col = find_column(instructors_df, ["instructor_id","instructors_id","id","instructorid","instr_id"])
+    instr_name_col = find_column(instructors_df, ["name","full_name","instructor_name"])
+    instr_quals_col = find_column(instructors_df, ["qualifications","qualification","qualified_courses","quals"])
+
+    if instr_id_col is None:
+        raise RuntimeError("Could not find instructor ID column in Instructors sheet. Columns found: " + ", ".join(instructors_df.columns))
+
+    instructors = {}
+    for iid, iname, raw_q in zip(str_col(instructors_df, instr_id_col),
+                                 str_col(instructors_df, instr_name_col),
+                                 str_col(instructors_df, instr_quals_col)):
+        if not iid:
+            # skip blank id rows
+            continue
+        # normalize separators ; or /
+        raw_q = raw_q.replace(";",",").replace("/",",")
+        quals = [q.strip() for q in raw_q.split(",") if q.strip()]
+        instructors[iid] = {"name": iname or iid, "quals": frozenset(quals)}
+
+    # Rooms
+    room_id_col = find_column(rooms_df, ["room_id","roomid","room","id"])
+    room_type_col = find_column(rooms_df, ["type","room_type","roomtype"])
+    room_cap_col = find_column(rooms_df, ["capacity","cap","room_capacity"])
+    rooms = {}
+    for rid, rtype, cap in zip(str_col(rooms_df, room_id_col or rooms_df.columns[0]),
+                               str_col(rooms_df, room_type_col),
+                               int_col(rooms_df, room_cap_col, 0)):
+        if not rid:
+            continue
+        rooms[rid] = {"type": rtype.lower(), "kind": classify_kind(rtype), "capacity": int(cap)}
+
+    # TimeSlots
+    ts_id_col = find_column(timeslots_df, ["time_slot_id","timeslotid","timeslot","id"])
+    ts_day_col = find_column(timeslots_df, ["day","weekday"])
+    ts_start_col = find_column(timeslots_df, ["start_time","start","begin"])
+    ts_end_col = find_column(timeslots_df, ["end_time","end","finish"])
+    timeslots = []
+    timeslot_info = {}
+    for tid, day, start, end in zip(str_col(timeslots_df, ts_id_col or timeslots_df.columns[0]),
+                                    str_col(timeslots_df, ts_day_col),
+                                    str_col(timeslots_df, ts_start_col),
+                                    str_col(timeslots_df, ts_end_col)):
+        if not tid:
+            continue
+        timeslots.append(tid)
+        timeslot_info[tid] = {"day": day, "start": start, "end": end}
+
+    # Sections
+    sec_id_col = find_column(sections_df, ["section_id","sectionid","section","id"])
+    sec_group_col = find_column(sections_df, ["group_number","group","groupno"])
+    sec_year_col = find_column(sections_df, ["year"])
+    sec_student_col = find_column(sections_df, ["student","students","student_count","studentcount","students_count"])
+    sections=[]
+    for sid, group, year, students in zip(str_col(sections_df, sec_id_col or sections_df.columns[0]),
+                                          str_col(sections_df, sec_group_col),
+                                          int_col(sections_df, sec_year_col, 1),
+                                          int_col(sections_df, sec_student_col, 0)):
+        if not sid:
+            continue
+        sections.append({"section_id": sid, "group": group,
+                         "year": int(year), "students": int(students)})
+
+    # Curriculum
+    cur_year_col = find_column(curriculum_df, ["year"])
+    cur_course_col = find_column(curriculum_df, ["course_id","courseid","course","id"])
+    curriculum = defaultdict(list)
+    for year, cid in zip(int_col(curriculum_df, cur_year_col, 1),
+                         str_col(curriculum_df, cur_course_col)):
+        if cid:
+            curriculum[int(year)].append(cid)
+
+    # Basic sanity check messages
+    msgs = []
+    if not courses:
+        msgs.append("Warning: no courses found (Courses sheet may be empty or columns different).")
+    if not instructors:
+        msgs.append("Warning: no instructors found.")
+    if not rooms:
+        msgs.append("Warning: no rooms found.")
+    if not timeslots:
+        msgs.append("Warning: no timeslots found.")
+    if not sections:
+        msgs.append("Warning: no sections found.")
+    if not curriculum:
+        msgs.append("Warning: no curriculum mapping found.")
+
+    return courses, instructors, rooms, timeslots, timeslot_info, sections, curriculum, msgs
+
+# Build variables & domains
+
+class LectureVar:
+    __slots__ = ("course", "section", "year", "idx", "students", "name", "_hash")
+    def __init__(self, course, section, year, idx, students):
+        self.course = course
+        self.section = section
+        self.year = year
+        self.idx = idx
+        self.students = students
+        self.name = f"{course}_{section}_L{idx}"
+        self._hash = hash(self.name)
+    def __repr__(self):
+        return self.name
+    def __hash__(self):
+        return self._hash
+    def __eq__(self, other):
+        return isinstance(other, LectureVar) and self.name==other.name
+
+# Domains stay factored as (compat_rooms, qualified, other) int32 index
+# arrays over the room/instructor orderings; every timeslot index applies
+def build_vars_domains(courses, instructors, rooms, timeslots, sections, curriculum):
+    variables = []
+    domains = {}
+    instr_list = list(instructors.keys()) if instructors else []
+    instr_pos = {i: k for k, i in enumerate(instr_list)}
+    room_pos = {r: k for k, r in enumerate(rooms)}
+    rooms_by_type = {}
+    rooms_cache = {}
+    qual_cache = {}
+    # Inverted qualification index, built once from the instructor side
+    qualified_by_course = defaultdict(list)
+    for iid, info in instructors.items():
+        for qcid in info["quals"]:
+            qualified_by_course[qcid].append(instr_pos[iid])
+    all_instr = np.arange(len(instr_list), dtype=np.int32)
+    for sec in sections:
+        year = sec["year"]
+        students = sec["students"]
+        s_id = sec["section_id"]
+        clist = curriculum.get(year, [])
+        for cid in clist:
+            cinfo = courses.get(cid, {})
+            ctype = cinfo.get("type","")
+            ckind = cinfo.get("kind", classify_kind(ctype))
+            if ctype not in rooms_by_type:
+                # one full room scan per ctype, sorted by capacity so the
+                # per-variable filter below is a binary search; shared kind
+                # bits and the lec-room catch-all answer most pairs, with
+                # compatible_room covering the empty/exact-label residue
+                bucket = sorted((ri.get("capacity",0), room_pos[r])
+                                for r, ri in rooms.items()
+                                if (ckind & ri.get("kind", 0)) or (ri.get("kind", 0) & KIND_LEC)
+                                or compatible_room(ctype, ri.get("type","")))
+                rooms_by_type[ctype] = ([cap for cap, _ in bucket],
+                                        np.array([p for _, p in bucket], np.int32))
+            rk = (ctype, students)
+            if rk not in rooms_cache:
+                caps, pos = rooms_by_type[ctype]
+                rooms_cache[rk] = pos[bisect_left(caps, students):]
+            if cid not in qual_cache:
+                # any instructor allowed (qualification flagged by which array)
+                qualified = np.array(sorted(qualified_by_course.get(cid, ())), np.int32)
+                qual_cache[cid] = (
+                    qualified,
+                    np.setdiff1d(all_instr, qualified, assume_unique=True))
+            sessions = 2 if "lec" in ctype else 1
+            for i in range(sessions):
+                v = LectureVar(cid, s_id, year, i, students)
+                variables.append(v)
+                qualified, other = qual_cache[cid]
+                domains[v] = (rooms_cache[rk], qualified, other)
+    return variables, domains
+
+
+# Greedy solver (hard constraints enforced; iterates the factored int domain;
+# busy[t_idx, resource_idx] bool matrices replace the tuple sets)
+def _min_conflict_pick(rooms_arr, qual_arr, other_arr, room_busy, instr_busy, n_ts):
+    # pick the option minimizing conflicts (a conflict-free one does not
+    # exist here, so one shared resource is the best case)
+    best = None
+    best_conf = 9
+    for instr_arr, qflag in ((qual_arr, True), (other_arr, False)):
+        for t in range(n_ts):
+            for r in rooms_arr:
+                conf_r = 1 if room_busy[t, r] else 0
+                for i in instr_arr:
+                    conf = conf_r + (1 if instr_busy[t, i] else 0)
+                    if conf < best_conf:
+                        best_conf = conf
+                        best = (t, int(r), int(i), qflag)
+                    if best_conf <= 1: break
+                if best_conf <= 1: break
+            if best_conf <= 1: break
+        if best_conf <= 1: break
+    return best
+
+# MRV + forward checking: pick the unassigned variable with the fewest
+# conflict-free options left, counted against the live busy matrices.
+# Variables sharing the same (rooms, quals) domain arrays have identical
+# counts, so each group is counted once per pick.
+def mrv_assign(variables, domains, instructors, rooms, timeslots, seed=None):
+    assigned = {}
+    ts_list = list(timeslots)
+    room_list = list(rooms.keys())
+    instr_list = list(instructors.keys())
+    n_ts = len(ts_list)
+    room_busy = np.zeros((n_ts, len(room_list)), np.bool_)
+    instr_busy = np.zeros((n_ts, len(instr_list)), np.bool_)
+    violations = 0
+    empty = np.empty(0, np.int32)
+    empty_dom = (empty, empty, empty)
+    var_list = list(variables)
+    if seed is not None:
+        # randomized restart: vary which variable wins MRV ties
+        random.Random(seed).shuffle(var_list)
+    doms = [domains.get(v, empty_dom) for v in var_list]
+    group_key = [(id(d[0]), id(d[1])) for d in doms]
+    unassigned = list(range(len(var_list)))
+    while unassigned:
+        live_by_group = {}
+        best = None
+        for k in unassigned:
+            gk = group_key[k]
+            live = live_by_group.get(gk)
+            if live is None:
+                rooms_arr, qual_arr, other_arr = doms[k]
+                if len(rooms_arr) and (len(qual_arr) or len(other_arr)):
+                    free_r = (~room_busy[:, rooms_arr]).sum(axis=1)
+                    free_i = np.zeros(n_ts, np.int64)
+                    if len(qual_arr):
+                        free_i += (~instr_busy[:, qual_arr]).sum(axis=1)
+                    if len(other_arr):
+                        free_i += (~instr_busy[:, other_arr]).sum(axis=1)
+                    live = int((free_r * free_i).sum())
+                else:
+                    live = 0
+                live_by_group[gk] = live
+            cand = (live, -var_list[k].students, k)
+            if best is None or cand < best:
+                best = cand
+        live, _, k = best
+        v = var_list[k]
+        unassigned.remove(k)
+        rooms_arr, qual_arr, other_arr = doms[k]
+        chosen = None
+        if live:
+            # a conflict-free option exists; take the first, qualified first
+            for instr_arr, qflag in ((qual_arr, True), (other_arr, False)):
+                for t in range(n_ts):
+                    for r in rooms_arr:
+                        if room_busy[t, r]:
+                            continue
+                        for i in instr_arr:
+                            if not instr_busy[t, i]:
+                                chosen = (t, int(r), int(i), qflag)
+                                break
+                        if chosen: break
+                    if chosen: break
+                if chosen: break
+        if not chosen:
+            # domain wipeout: fall back to the greedy min-conflict pick
+            chosen = _min_conflict_pick(rooms_arr, qual_arr, other_arr,
+                                        room_busy, instr_busy, n_ts)
+            if chosen:
+                violations += 1
+        if chosen:
+            t, r, i, q = chosen
+            room_busy[t, r] = True
+            instr_busy[t, i] = True
+            assigned[v] = (ts_list[t], room_list[r], instr_list[i], q)
+        else:
+            # ultimate synthetic fallback
+            assigned[v] = (ts_list[0] if n_ts else "ts0",
+                           room_list[0] if room_list else "room0",
+                           instr_list[0] if instr_list else "instr0",
+                           False)
+            violations += 1
+    return assigned, violations
+
+def try_assign(args):
+    """One seeded MRV restart; top-level so worker processes can pickle it."""
+    seed, variables, domains, instructors, rooms, timeslots = args
+    return mrv_assign(variables, domains, instructors, rooms, timeslots, seed=seed)
+
+def mrv_assign_ensemble(variables, domains, instructors, rooms, timeslots):
+    """Run seeded MRV restarts in parallel and keep the fewest-violations one."""
+    n_workers = os.cpu_count() or 1
+    jobs = [(seed, variables, domains, instructors, rooms, timeslots)
+            for seed in range(n_workers)]
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(try_assign, jobs))
+    except OSError:
+        # no subprocess support (e.g. restricted environments): run inline
+        results = [try_assign(job) for job in jobs]
+    return min(results, key=lambda res: res[1])
+
+
+# Local improvement to increase qualified assignments (no hard-constraint breaks)
+def improve_assignments(assigned, domains, instructors, rooms, timeslots, max_iters=5000):
+    ts_list = list(timeslots)
+    room_list = list(rooms.keys())
+    instr_list = list(instructors.keys())
+    ts_pos = {t: k for k, t in enumerate(ts_list)}
+    room_pos = {r: k for k, r in enumerate(room_list)}
+    instr_pos = {i: k for k, i in enumerate(instr_list)}
+    n_ts = len(ts_list)
+    # rebuild the busy matrices from the current assignment
+    room_busy = np.zeros((n_ts, len(room_list)), np.bool_)
+    instr_busy = np.zeros((n_ts, len(instr_list)), np.bool_)
+    cur_idx = {}
+    for v, (t, r, i, q) in assigned.items():
+        ti, ri, ii = ts_pos.get(t), room_pos.get(r), instr_pos.get(i)
+        cur_idx[v] = (ti, ri, ii)
+        if ti is not None and ri is not None:
+            room_busy[ti, ri] = True
+        if ti is not None and ii is not None:
+            instr_busy[ti, ii] = True
+    unqualified = [v for v,val in assigned.items() if not val[3]]
+    random.shuffle(unqualified)
+    improved = 0
+    it = 0
+    empty = np.empty(0, np.int32)
+    empty_dom = (empty, empty, empty)
+    while unqualified and it < max_iters:
+        v = unqualified.pop()
+        it += 1
+        rooms_arr, qual_arr, _ = domains.get(v, empty_dom)
+        ct, cr, ci = cur_idx[v]
+        found = None
+        # only qualified candidates can improve; index the free slots of
+        # that slice straight off the busy matrices
+        free_rooms = ~room_busy[:, rooms_arr]
+        free_instr = ~instr_busy[:, qual_arr]
+        if ct is not None:
+            # v's own booking does not block it
+            if cr is not None:
+                free_rooms[ct] |= (rooms_arr == cr)
+            if ci is not None:
+                free_instr[ct] |= (qual_arr == ci)
+        cand_t = np.nonzero(free_rooms.any(axis=1) & free_instr.any(axis=1))[0]
+        if cand_t.size:
+            t = int(cand_t[0])
+            found = (t,
+                     int(rooms_arr[int(np.argmax(free_rooms[t]))]),
+                     int(qual_arr[int(np.argmax(free_instr[t]))]))
+        if found:
+            # free old
+            if ct is not None and cr is not None:
+                room_busy[ct, cr] = False
+            if ct is not None and ci is not None:
+                instr_busy[ct, ci] = False
+            nt, nr, ni = found
+            room_busy[nt, nr] = True
+            instr_busy[nt, ni] = True
+            cur_idx[v] = found
+            assigned[v] = (ts_list[nt], room_list[nr], instr_list[ni], True)
+            improved += 1
+    return assigned, improved
+
+# Export CSV and report
+def export_results(assigned, timeslot_info, instructors, out_csv="timetable_solution.csv", report_file="report.txt", runtime=0, violations=0, improved=0):
+    # stream rows straight to disk; count the report totals while writing
+    fields = ["Variable","Year","Course","Section","TimeslotID","Day","Start",
+              "End","Room","InstructorID","InstructorName","InstructorQualified"]
+    total = 0
+    qualified = 0
+    with open(out_csv, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        for v,val in assigned.items():
+            t,r,iid,qual = val
+            info = timeslot_info.get(t, {"day":"", "start":"", "end":""})
+            instr_name = instructors.get(iid, {}).get("name", iid)
+            w.writerow({
+                "Variable": v.name,
+                "Year": v.year,
+                "Course": v.course,
+                "Section": v.section,
+                "TimeslotID": t,
+                "Day": info.get("day",""),
+                "Start": info.get("start",""),
+                "End": info.get("end",""),
+                "Room": r,
+                "InstructorID": iid,
+                "InstructorName": instr_name,
+                "InstructorQualified": bool(qual)
+            })
+            total += 1
+            qualified += bool(qual)
+    with open(report_file, "w", encoding="utf-8") as f:
+        f.write(f"Timetable generation report\n")
+        f.write(f"Rows (assigned lectures): {total}\n")
+        f.write(f"Qualified assignments: {qualified}\n")
+        f.write(f"Unqualified assignments: {total-qualified}\n")
+        f.write(f"Violations during assignment (fallbacks): {violations}\n")
+        f.write(f"Local improvements applied: {improved}\n")
+        f.write(f"Generation time (s): {runtime:.4f}\n")
+    return out_csv, report_file
+
+# GUI & orchestration
+def run_gui():
+    # imported here so headless --no-gui runs work without tkinter installed
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+
+    root = tk.Tk()
+    root.title("Timetable CSP Generator (v3)")
+
+    def choose_and_run():
+        path = filedialog.askopenfilename(filetypes=[("Excel files","*.xlsx;*.xls")])
+        if not path:
+            return
+        try:
+            t0 = time.time()
+            courses_df, instructors_df, rooms_df, timeslots_df, sections_df, curriculum_df = load_tables_xlsx(path)
+            courses, instructors, rooms, timeslots, timeslot_info, sections, curriculum, msgs = preprocess(
+                courses_df, instructors_df, rooms_df, timeslots_df, sections_df, curriculum_df
+            )
+            log_msgs = "\n".join(msgs)
+            variables, domains = build_vars_domains(courses, instructors, rooms, timeslots, sections, curriculum)
+            assigned, violations = mrv_assign_ensemble(variables, domains, instructors, rooms, timeslots)
+            assigned, improved = improve_assignments(assigned, domains, instructors, rooms, timeslots)
+            runtime = time.time() - t0
+            out_csv, report_file = export_results(assigned, timeslot_info, instructors, runtime=runtime, violations=violations, improved=improved)
+            messagebox.showinfo("Done", f"Generated {out_csv}\nReport: {report_file}\nTime: {runtime:.2f}s\n{log_msgs}")
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+
+    tk.Label(root, text="Select Tables.xlsx and generate timetable").pack(padx=12, pady=8)
+    tk.Button(root, text="Choose Tables.xlsx", command=choose_and_run, width=30, bg="#2b7", fg="black").pack(pady=8)
+    tk.Button(root, text="Quit", command=root.quit, width=10, bg="#f55").pack(pady=6)
+    root.mainloop()
+
+def main_cli(input_path, output_csv):
+    # same pipeline as choose_and_run, minus the Tk window
+    t0 = time.time()
+    courses_df, instructors_df, rooms_df, timeslots_df, sections_df, curriculum_df = load_tables_xlsx(input_path)
+    courses, instructors, rooms, timeslots, timeslot_info, sections, curriculum, msgs = preprocess(
+        courses_df, instructors_df, rooms_df, timeslots_df, sections_df, curriculum_df
+    )
+    for m in msgs:
+        print(m)
+    variables, domains = build_vars_domains(courses, instructors, rooms, timeslots, sections, curriculum)
+    assigned, violations = mrv_assign_ensemble(variables, domains, instructors, rooms, timeslots)
+    assigned, improved = improve_assignments(assigned, domains, instructors, rooms, timeslots)
+    runtime = time.time() - t0
+    out_csv, report_file = export_results(assigned, timeslot_info, instructors, out_csv=output_csv,
+                                          runtime=runtime, violations=violations, improved=improved)
+    print(f"Generated {out_csv} (report: {report_file}) in {runtime:.2f}s")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Timetable CSP generator")
+    parser.add_argument("--no-gui", action="store_true", help="run headless instead of opening the Tkinter file picker")
+    parser.add_argument("--input", default="Tables.xlsx", help="input workbook (headless mode)")
+    parser.add_argument("--output", default="timetable_solution.csv", help="output CSV (headless mode)")
+    args = parser.parse_args()
+    if args.no_gui:
+        main_cli(args.input, args.output)
+    else:
+        run_gui()
+
+    #streamlet
+
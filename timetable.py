@@ -1,23 +1,64 @@
 
+import csv
 import pandas as pd
-import random
+import numpy as np
 import time
+from bisect import bisect_left
 from collections import defaultdict
+from functools import lru_cache
+
+try:
+    from numba import njit
+except ImportError:  # numba not installed: run the kernel as plain Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda f: f
 
 # Helper functions
 
-def safe_str(x):
-    if pd.isna(x):
-        return ""
-    return str(x).strip()
+def find_col(df, *candidates):
+    """Resolve a column name case-insensitively, once per sheet."""
+    lower = {c.strip().lower(): c for c in df.columns}
+    for cand in candidates:
+        if cand in lower:
+            return lower[cand]
+    return None
 
-def int_safe(x, default=0):
-    try:
-        return int(x)
-    except:
-        return default
+def str_col(df, col):
+    """Whole-column string cleanup: strip and blank out NaNs in one pass."""
+    if col is None:
+        return np.full(len(df), "", dtype=object)
+    return df[col].astype("string").str.strip().fillna("").to_numpy()
+
+def int_col(df, col, default=0):
+    """Whole-column int parse: coerce to int32 with a default for bad cells."""
+    if col is None:
+        return np.full(len(df), default, dtype=np.int32)
+    return pd.to_numeric(df[col], errors='coerce').fillna(default).astype(np.int32).to_numpy()
+
+# Kind bitmasks classify the free-form type labels once at load time.
+# Composite labels like "lecture,lab" set several bits, so a single code
+# cannot stand in for them; compatibility is a shared bit, the lec-room
+# catch-all, or compatible_room's exact-label residue.
+KIND_LEC, KIND_LAB, KIND_PROJECT = 1, 2, 4
 
+@lru_cache(maxsize=128)
+def classify_kind(type_str):
+    s = (type_str or "").lower()
+    kind = 0
+    if "lec" in s:
+        kind |= KIND_LEC
+    if "lab" in s:
+        kind |= KIND_LAB
+    if "project" in s:
+        kind |= KIND_PROJECT
+    return kind
+
+@lru_cache(maxsize=128)
 def compatible_room(course_type, room_type):
+    # only a handful of (course_type, room_type) pairs exist, so the
+    # substring tests run once per pair and hit the cache afterwards
     c = (course_type or "").lower()
     r = (room_type or "").lower()
     if c == r:
@@ -36,7 +77,11 @@ def compatible_room(course_type, room_type):
 # Load Excel sheets
 
 def load_tables_xlsx(path="Tables.xlsx"):
-    xls = pd.ExcelFile(path)
+    # Rust-backed calamine engine when installed, else default openpyxl
+    try:
+        xls = pd.ExcelFile(path, engine="calamine")
+    except (ImportError, ValueError):
+        xls = pd.ExcelFile(path, engine="openpyxl")
     sheets = {name.lower(): name for name in xls.sheet_names}
     required = {
         "courses": ["courses"],
@@ -46,7 +91,7 @@ def load_tables_xlsx(path="Tables.xlsx"):
         "curriculum": ["curriculum"],
         "instructors": ["instructors", "instructor"]
     }
-    data = {}
+    found_sheets = {}
     missing = []
     for key, variants in required.items():
         found = None
@@ -57,165 +102,266 @@ def load_tables_xlsx(path="Tables.xlsx"):
         if not found:
             missing.append(key)
         else:
-            data[key] = pd.read_excel(xls, found)
+            found_sheets[key] = found
     if missing:
         raise RuntimeError(f"Missing sheets: {missing}")
+    # one workbook parse for all six sheets instead of one per call
+    frames = pd.read_excel(xls, sheet_name=list(found_sheets.values()))
+    data = {key: frames[name] for key, name in found_sheets.items()}
     return data["courses"], data["instructors"], data["rooms"], data["timeslots"], data["sections"], data["curriculum"]
 
 
 # Preprocess data
 
 def preprocess(courses_df, instructors_df, rooms_df, timeslots_df, sections_df, curriculum_df):
-    # Courses
-    courses = {}
-    for _, r in courses_df.iterrows():
-        cid = safe_str(r.get("course_id", r.get("CourseID", r.iloc[0])))
-        cname = safe_str(r.get("course_name", r.get("CourseName", "")))
-        ctype = safe_str(r.get("type", r.get("Type", ""))).lower()
-        courses[cid] = {"name": cname, "type": ctype}
+    # Courses (columns resolved once, then cleaned arrays zipped per sheet)
+    cid_col = find_col(courses_df, "course_id", "courseid") or courses_df.columns[0]
+    courses = {c: {"name": n, "type": t.lower(), "kind": classify_kind(t)}
+               for c, n, t in zip(str_col(courses_df, cid_col),
+                                  str_col(courses_df, find_col(courses_df, "course_name", "coursename")),
+                                  str_col(courses_df, find_col(courses_df, "type")))}
 
     # Instructors
+    iid_col = find_col(instructors_df, "instructor_id", "instructors_id", "instructorid") or instructors_df.columns[0]
     instructors = {}
-    for _, r in instructors_df.iterrows():
-        iid = safe_str(r.get("instructor_id", r.get("instructors_id", r.get("InstructorID", r.iloc[0]))))
-        name = safe_str(r.get("name", r.get("Name", "")))
-        quals_raw = safe_str(r.get("qualifications", r.get("Qualifications", "")))
+    for iid, name, quals_raw in zip(str_col(instructors_df, iid_col),
+                                    str_col(instructors_df, find_col(instructors_df, "name")),
+                                    str_col(instructors_df, find_col(instructors_df, "qualifications"))):
         quals = [q.strip() for q in quals_raw.replace(";", ",").split(",") if q.strip()]
-        instructors[iid] = {"name": name, "quals": set(quals)}
+        instructors[iid] = {"name": name, "quals": frozenset(quals)}
 
     # Rooms
-    rooms = {}
-    for _, r in rooms_df.iterrows():
-        rid = safe_str(r.get("room_id", r.get("RoomID", r.iloc[0])))
-        rtype = safe_str(r.get("type", r.get("Type", ""))).lower()
-        cap = int_safe(r.get("capacity", r.get("Capacity", 0)))
-        rooms[rid] = {"type": rtype, "capacity": cap}
+    rid_col = find_col(rooms_df, "room_id", "roomid") or rooms_df.columns[0]
+    rooms = {r: {"type": t.lower(), "kind": classify_kind(t), "capacity": int(cap)}
+             for r, t, cap in zip(str_col(rooms_df, rid_col),
+                                  str_col(rooms_df, find_col(rooms_df, "type")),
+                                  int_col(rooms_df, find_col(rooms_df, "capacity"), 0))}
 
     # Timeslots
+    tid_col = find_col(timeslots_df, "time_slot_id", "timeslotid") or timeslots_df.columns[0]
     timeslots = []
     timeslot_info = {}
-    for _, r in timeslots_df.iterrows():
-        tid = safe_str(r.get("time_slot_id", r.get("TimeSlotID", r.iloc[0])))
-        day = safe_str(r.get("day", r.get("Day", "")))
-        start = safe_str(r.get("start_time", r.get("Start", "")))
-        end = safe_str(r.get("end_time", r.get("End", "")))
+    for tid, day, start, end in zip(str_col(timeslots_df, tid_col),
+                                    str_col(timeslots_df, find_col(timeslots_df, "day")),
+                                    str_col(timeslots_df, find_col(timeslots_df, "start_time", "start")),
+                                    str_col(timeslots_df, find_col(timeslots_df, "end_time", "end"))):
         timeslots.append(tid)
         timeslot_info[tid] = {"day": day, "start": start, "end": end}
 
     # Sections
-    sections = []
-    for _, r in sections_df.iterrows():
-        sid = safe_str(r.get("section_id", r.get("SectionID", r.iloc[0])))
-        year = int_safe(r.get("year", r.get("Year", 1)))
-        students = int_safe(r.get("student", r.get("students", r.get("StudentCount", 0))))
-        sections.append({"section_id": sid, "year": year, "students": students})
+    sid_col = find_col(sections_df, "section_id", "sectionid") or sections_df.columns[0]
+    sections = [{"section_id": s, "year": int(y), "students": int(n)}
+                for s, y, n in zip(str_col(sections_df, sid_col),
+                                   int_col(sections_df, find_col(sections_df, "year"), 1),
+                                   int_col(sections_df, find_col(sections_df, "student", "students", "studentcount"), 0))]
 
     # Curriculum
+    ccid_col = find_col(curriculum_df, "course_id", "courseid")
+    if ccid_col is None and len(curriculum_df.columns) > 1:
+        ccid_col = curriculum_df.columns[1]
     curriculum = defaultdict(list)
-    for _, r in curriculum_df.iterrows():
-        year = int_safe(r.get("year", r.get("Year", 1)))
-        cid = safe_str(r.get("course_id", r.get("CourseID", r.iloc[1] if len(r) > 1 else "")))
+    for year, cid in zip(int_col(curriculum_df, find_col(curriculum_df, "year"), 1),
+                         str_col(curriculum_df, ccid_col)):
         if cid:
-            curriculum[year].append(cid)
+            curriculum[int(year)].append(cid)
 
     return courses, instructors, rooms, timeslots, timeslot_info, sections, curriculum
 
-# Lecture variable
-
-class LectureVar:
-    def __init__(self, course, section, year, idx, students):
-        self.course = course
-        self.section = section
-        self.year = year
-        self.idx = idx
-        self.students = students
-        self.name = f"{course}_{section}_L{idx}"
-
 # Build variables and domains
+# Variables are plain integer ids into parallel arrays (SoA layout);
+# domains stay factored as (compat_rooms, qualified, other) int32 index
+# arrays over the room/instructor orderings; every timeslot index applies
 def build_vars_domains(courses, instructors, rooms, timeslots, sections, curriculum):
-    variables = []
-    domains = {}
+    var_course = []
+    var_section = []
+    var_year = []
+    var_idx = []
+    var_students = []
+    domains = []
+    instr_list = list(instructors.keys())
+    instr_pos = {i: k for k, i in enumerate(instr_list)}
+    room_pos = {r: k for k, r in enumerate(rooms)}
+    rooms_by_type = {}
+    rooms_cache = {}
+    qual_cache = {}
+    # Inverted qualification index, built once from the instructor side
+    qualified_by_course = defaultdict(list)
+    for iid, info in instructors.items():
+        for qcid in info["quals"]:
+            qualified_by_course[qcid].append(instr_pos[iid])
+    all_instr = np.arange(len(instr_list), dtype=np.int32)
     for sec in sections:
         sec_year = sec["year"]
         sec_students = sec["students"]
         sec_id = sec["section_id"]
         for cid in curriculum.get(sec_year, []):
-            ctype = courses.get(cid, {}).get("type", "")
+            cinfo = courses.get(cid, {})
+            ctype = cinfo.get("type", "")
+            ckind = cinfo.get("kind", classify_kind(ctype))
+            if ctype not in rooms_by_type:
+                # one full room scan per ctype, sorted by capacity so the
+                # per-variable filter below is a binary search; shared kind
+                # bits and the lec-room catch-all answer most pairs, with
+                # compatible_room covering the exact-label residue
+                bucket = sorted((ri["capacity"], room_pos[r])
+                                for r, ri in rooms.items()
+                                if (ckind & ri["kind"]) or (ri["kind"] & KIND_LEC)
+                                or compatible_room(ctype, ri["type"]))
+                rooms_by_type[ctype] = ([cap for cap, _ in bucket],
+                                        np.array([p for _, p in bucket], np.int32))
+            rk = (ctype, sec_students)
+            if rk not in rooms_cache:
+                caps, pos = rooms_by_type[ctype]
+                rooms_cache[rk] = pos[bisect_left(caps, sec_students):]
+            if cid not in qual_cache:
+                qualified = np.array(sorted(qualified_by_course.get(cid, ())), np.int32)
+                qual_cache[cid] = (
+                    qualified,
+                    np.setdiff1d(all_instr, qualified, assume_unique=True))
             sessions = 2 if "lec" in ctype else 1
+            qualified, other = qual_cache[cid]
             for i in range(sessions):
-                v = LectureVar(cid, sec_id, sec_year, i, sec_students)
-                variables.append(v)
-                dom = []
-                for t in timeslots:
-                    for r, rinfo in rooms.items():
-                        if not compatible_room(ctype, rinfo["type"]):
-                            continue
-                        if rinfo["capacity"] < sec_students:
-                            continue
-                        for instr_id, info in instructors.items():
-                            qual = cid in info["quals"]
-                            dom.append((t, r, instr_id, qual))
-                domains[v] = dom
+                var_course.append(cid)
+                var_section.append(sec_id)
+                var_year.append(sec_year)
+                var_idx.append(i)
+                var_students.append(sec_students)
+                domains.append((rooms_cache[rk], qualified, other))
+    variables = {
+        "course": var_course,
+        "section": var_section,
+        "year": var_year,
+        "idx": var_idx,
+        "students": np.array(var_students, np.int32),
+    }
     return variables, domains
 
 
-# Greedy assignment
-def greedy_assign(variables, domains, instructors, rooms, timeslots):
-    assigned = {}
-    used_room_ts = set()
-    used_instr_ts = set()
-    for v in sorted(variables, key=lambda x: -x.students):
-        dom = domains.get(v, [])
-        qualified = [d for d in dom if d[3]]
-        unqualified = [d for d in dom if not d[3]]
-        chosen = None
-        for option in qualified + unqualified:
-            t, r, instr, q = option
-            if (t, r) in used_room_ts or (t, instr) in used_instr_ts:
-                continue
-            chosen = option
-            break
-        if chosen is None:
-            if dom:
-                chosen = random.choice(dom)
+# Compiled greedy core: per-variable domains arrive as flat index arrays
+# with offsets; the whole assignment loop runs without Python dispatch
+@njit(cache=True)
+def _greedy_core(order, room_flat, room_off, qual_flat, qual_off,
+                 other_flat, other_off, n_ts, room_busy, instr_busy, out):
+    for idx in range(order.shape[0]):
+        k = order[idx]
+        t_sel = -1
+        r_sel = -1
+        i_sel = -1
+        q_sel = 0
+        for want_qual in range(1, -1, -1):
+            if t_sel >= 0:
+                break
+            if want_qual == 1:
+                i_lo, i_hi = qual_off[k], qual_off[k + 1]
+            else:
+                i_lo, i_hi = other_off[k], other_off[k + 1]
+            for t in range(n_ts):
+                if t_sel >= 0:
+                    break
+                for rj in range(room_off[k], room_off[k + 1]):
+                    r = room_flat[rj]
+                    if room_busy[t, r]:
+                        continue
+                    for ij in range(i_lo, i_hi):
+                        i = qual_flat[ij] if want_qual == 1 else other_flat[ij]
+                        if not instr_busy[t, i]:
+                            t_sel, r_sel, i_sel, q_sel = t, r, i, want_qual
+                            break
+                    if t_sel >= 0:
+                        break
+        if t_sel < 0:
+            # random fallback over the factored product, as random.choice on
+            # the materialized domain used to do
+            nr = room_off[k + 1] - room_off[k]
+            nq = qual_off[k + 1] - qual_off[k]
+            no = other_off[k + 1] - other_off[k]
+            if n_ts > 0 and nr > 0 and nq + no > 0:
+                t_sel = np.random.randint(0, n_ts)
+                r_sel = room_flat[room_off[k] + np.random.randint(0, nr)]
+                pick = np.random.randint(0, nq + no)
+                if pick < nq:
+                    i_sel = qual_flat[qual_off[k] + pick]
+                    q_sel = 1
+                else:
+                    i_sel = other_flat[other_off[k] + pick - nq]
             else:
-                t = random.choice(timeslots)
-                r = random.choice(list(rooms.keys()))
-                instr = random.choice(list(instructors.keys()))
-                chosen = (t, r, instr, False)
-        assigned[v] = chosen
-        t, r, instr, _ = chosen
-        used_room_ts.add((t, r))
-        used_instr_ts.add((t, instr))
+                t_sel = np.random.randint(0, n_ts)
+                r_sel = np.random.randint(0, room_busy.shape[1])
+                i_sel = np.random.randint(0, instr_busy.shape[1])
+        room_busy[t_sel, r_sel] = True
+        instr_busy[t_sel, i_sel] = True
+        out[k, 0] = t_sel
+        out[k, 1] = r_sel
+        out[k, 2] = i_sel
+        out[k, 3] = q_sel
+
+# Greedy assignment wrapper: sorts and flattens in Python, solves in the
+# compiled core, returns an (N, 4) int32 array of [t, r, i, qual] indices
+# (test.py keeps its Python variant for the violation accounting the GUI
+# reports)
+def greedy_assign(variables, domains, instructors, rooms, timeslots):
+    n_ts = len(timeslots)
+    n_vars = len(domains)
+    empty = np.empty(0, np.int32)
+    room_off = np.zeros(n_vars + 1, np.int64)
+    qual_off = np.zeros(n_vars + 1, np.int64)
+    other_off = np.zeros(n_vars + 1, np.int64)
+    for k, (ra, qa, oa) in enumerate(domains):
+        room_off[k + 1] = room_off[k] + len(ra)
+        qual_off[k + 1] = qual_off[k] + len(qa)
+        other_off[k + 1] = other_off[k] + len(oa)
+    room_flat = np.concatenate([d[0] for d in domains] or [empty])
+    qual_flat = np.concatenate([d[1] for d in domains] or [empty])
+    other_flat = np.concatenate([d[2] for d in domains] or [empty])
+    order = np.argsort(-variables["students"], kind="stable").astype(np.int64)
+    room_busy = np.zeros((n_ts, len(rooms)), np.bool_)
+    instr_busy = np.zeros((n_ts, len(instructors)), np.bool_)
+    assigned = np.empty((n_vars, 4), np.int32)
+    _greedy_core(order, room_flat, room_off, qual_flat, qual_off,
+                 other_flat, other_off, n_ts, room_busy, instr_busy, assigned)
     return assigned
 
 
 # Export CSV
-def export_csv(assigned, timeslot_info, instructors, filename="timetable_solution.csv"):
-    rows = []
-    for v, val in assigned.items():
-        if val is None:
-            continue
-        t, r, instr_id, qual = val
-        info = timeslot_info.get(t, {"day": "", "start": "", "end": ""})
-        instr_name = instructors[instr_id]["name"] if instr_id in instructors else instr_id
-        rows.append({
-            "Variable": v.name,
-            "Year": v.year,
-            "Course": v.course,
-            "Section": v.section,
-            "TimeslotID": t,
-            "Day": info["day"],
-            "Start": info["start"],
-            "End": info["end"],
-            "Room": r,
-            "InstructorID": instr_id,
-            "InstructorName": instr_name,
-            "InstructorQualified": bool(qual)
-        })
-    df = pd.DataFrame(rows)
-    df.to_csv(filename, index=False)
-    print(f"✅ Exported {len(df)} rows to {filename}")
+EXPORT_FIELDS = ["Variable", "Year", "Course", "Section", "TimeslotID", "Day",
+                 "Start", "End", "Room", "InstructorID", "InstructorName",
+                 "InstructorQualified"]
+
+def export_csv(assigned, variables, timeslot_info, instructors, rooms, timeslots,
+               filename="timetable_solution.csv"):
+    # stream rows straight to disk; decode the int-encoded assignment
+    # through the same id orderings the solver indexed into
+    ts_list = list(timeslots)
+    room_list = list(rooms.keys())
+    instr_list = list(instructors.keys())
+    total = 0
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=EXPORT_FIELDS)
+        w.writeheader()
+        for k in range(len(assigned)):
+            t, r, i, qual = (int(x) for x in assigned[k])
+            tid = ts_list[t]
+            instr_id = instr_list[i]
+            info = timeslot_info.get(tid, {"day": "", "start": "", "end": ""})
+            instr_name = instructors[instr_id]["name"] if instr_id in instructors else instr_id
+            course = variables["course"][k]
+            section = variables["section"][k]
+            w.writerow({
+                "Variable": f"{course}_{section}_L{variables['idx'][k]}",
+                "Year": variables["year"][k],
+                "Course": course,
+                "Section": section,
+                "TimeslotID": tid,
+                "Day": info["day"],
+                "Start": info["start"],
+                "End": info["end"],
+                "Room": room_list[r],
+                "InstructorID": instr_id,
+                "InstructorName": instr_name,
+                "InstructorQualified": bool(qual)
+            })
+            total += 1
+    print(f"✅ Exported {total} rows to {filename}")
 
 # Main
 def main():
@@ -226,9 +372,9 @@ def main():
     )
     print(f"✅ Loaded data: {len(courses)} courses, {len(instructors)} instructors, {len(rooms)} rooms, {len(timeslots)} timeslots, {len(sections)} sections.")
     variables, domains = build_vars_domains(courses, instructors, rooms, timeslots, sections, curriculum)
-    print(f"🧩 Created {len(variables)} lecture variables.")
+    print(f"🧩 Created {len(domains)} lecture variables.")
     assigned = greedy_assign(variables, domains, instructors, rooms, timeslots)
-    export_csv(assigned, timeslot_info, instructors, "timetable_solution.csv")
+    export_csv(assigned, variables, timeslot_info, instructors, rooms, timeslots, "timetable_solution.csv")
     print("🎉 Done. No nulls in timetable_solution.csv")
 
 if __name__ == "__main__":